@@ -7,7 +7,16 @@ Author(s):
     Charles Machalow via the MIT License
 '''
 import inspect
+import keyword
+import struct
+import threading
+from collections import namedtuple
 from ctypes import *
+from functools import lru_cache
+
+# keep a handle on ctypes' sizeof... the module defines a caching wrapper under the
+#   same name further down
+_ctypesSizeof = sizeof
 
 '''
 This would be most optimal:
@@ -26,6 +35,12 @@ getDynamicStructure(fields=[
     ('arrayA',    lambda self, buffer: c_uint8  * self.arraySize),
     ('arrayB',    lambda self, buffer: c_uint16 * self.arraySize),
 ], pack=1)
+
+performance tip: have the size functions read header fields directly (self.arraySize)
+    instead of calling len() on an earlier array field (len(self.arrayA))... the header
+    read is plain integer math while len() dispatches through the ctypes array's
+    __len__. ctypes caches the resulting array types (c_uint8 * N) itself, so equal
+    sizes re-use the same type (and our class cache) for free.
 '''
 
 class DynamicStructureError(ValueError):
@@ -40,30 +55,240 @@ class BufferSizeInsufficient(DynamicStructureError):
     ''' raised in the event that we don't have enough buffer space '''
     pass
 
+# per-thread scratch storage for staging non-buffer-protocol fills
+_TLS = threading.local()
+
+def _fillFromSequence(structure, buffer, numBytes):
+    ''' copies numBytes ints from a plain sequence (e.g. a list) into the structure by
+        staging them in a per-thread scratch bytearray that's grown geometrically and
+        reused across calls... no per-fill bytes allocation '''
+    scratch = getattr(_TLS, 'scratch', None)
+    if scratch is None or len(scratch) < numBytes:
+        scratch = _TLS.scratch = bytearray(max(numBytes, 64, (len(scratch) * 2) if scratch is not None else 0))
+
+    # bytearray slice assignment from an int sequence happens at C speed
+    scratch[:numBytes] = buffer if len(buffer) == numBytes else buffer[:numBytes]
+    memmove(byref(structure), (c_uint8 * numBytes).from_buffer(scratch), numBytes)
+
 class BaseStructure(Structure):
     ''' simple base Structure to inherit from '''
     def _getBytes(self):
         ''' returns the bytes for this structure (by reference... sort of) '''
         return cast(byref(self), POINTER(c_uint8))
 
+    def getBytesView(self):
+        ''' returns a writable zero-copy memoryview over this structure's bytes.
+            individual (array) fields also support memoryview(struct.Field) directly,
+            so consumers like the struct module don't need to box elements into ints '''
+        return memoryview(self).cast('B')
+
     def fill(self, buffer):
-        ''' fills this instance of the struct with the given buffer '''
-        for i in range(min(len(buffer), sizeof(self))):
-            self._getBytes()[i] = buffer[i]
+        ''' fills this instance of the struct with the given buffer via a single memmove '''
+        if isinstance(buffer, bytes):
+            memmove(byref(self), buffer, min(len(buffer), sizeof(self)))
+            return self
+
+        try:
+            view = memoryview(buffer).cast('B')
+        except TypeError:
+            view = None
+
+        if view is None:
+            # not a buffer-protocol object (e.g. a plain list)... stage it through the
+            #   reusable per-thread scratch buffer
+            _fillFromSequence(self, buffer, min(len(buffer), sizeof(self)))
+        else:
+            numBytes = min(view.nbytes, sizeof(self))
+            if view.readonly:
+                memmove(byref(self), bytes(view[:numBytes]), numBytes)
+            else:
+                # writable sources (bytearray, array.array('B'), mmap, ...) can be
+                #   copied from directly with no intermediate bytes object
+                memmove(byref(self), (c_uint8 * numBytes).from_buffer(view), numBytes)
         return self
 
-def getStructureType(fieldTuple, buffer, parent=BaseStructure, pack=1, anonymous=None):
+    @classmethod
+    def view(cls, buffer):
+        ''' returns an instance aliasing the given writable buffer (e.g. a bytearray)
+            instead of copying it... reads and writes go straight to the caller's
+            memory. The view is kept alive on the instance '''
+        bufferView = (buffer if isinstance(buffer, memoryview) else memoryview(buffer)).cast('B')
+        instance = cls.from_buffer(bufferView)
+        instance._keepalive = bufferView
+        return instance
+
+    @classmethod
+    def acquire(cls, buffer):
+        ''' pool-backed alternative to cls().fill(buffer)... reuses an instance handed
+            back via release() (skipping the per-call allocation and zero-init) or makes
+            a fresh one. The caller owns the instance until it release()s it again '''
+        pool = cls.__dict__.get('_pool')
+        instance = None
+        if pool:
+            # list.pop() is atomic, but another thread can race us to the last pooled
+            #   instance between the check and the pop... just make a fresh one then
+            try:
+                instance = pool.pop()
+            except IndexError:
+                pass
+
+        if instance is None:
+            instance = cls()
+        elif len(buffer) < sizeof(cls):
+            # short buffers rely on the rest of the struct being zeroed... a reused
+            #   instance still has its old bytes, so clear them first
+            memset(byref(instance), 0, sizeof(cls))
+        return instance.fill(buffer)
+
+    def release(self):
+        ''' returns this instance to its class' pool for reuse by acquire() '''
+        cls = type(self)
+        if '_pool' not in cls.__dict__:
+            cls._pool = []
+        cls._pool.append(self)
+
+def sizeof(typeOrInstance):
+    ''' drop-in for ctypes.sizeof() that returns the size stashed on our generated
+        classes at build time instead of having ctypes re-walk the type every call '''
+    typ = typeOrInstance if isinstance(typeOrInstance, type) else type(typeOrInstance)
+
+    # look in __dict__ directly... a user subclass that adds fields shouldn't inherit
+    #   its parent's cached size
+    cachedSize = typ.__dict__.get('_cached_size')
+    if cachedSize is not None:
+        return cachedSize
+
+    return _ctypesSizeof(typeOrInstance)
+
+def _isDynamicField(typeOrFunction):
+    ''' True if a field's type is a function to evaluate rather than a ctypes type.
+        callable-but-not-a-type is a pair of builtins (quicker than inspect.isfunction)
+        and also accepts things like functools.partial '''
+    return callable(typeOrFunction) and not isinstance(typeOrFunction, type)
+
+def _collectMroFields(typ):
+    ''' collects _fields_ across the mro for a class that wasn't generated here '''
+    fields = []
+    for klass in reversed(typ.mro()):
+        # use __dict__ to not double-count fields inherited from a parent
+        fields.extend(klass.__dict__.get('_fields_', []))
+    return fields
+
+def _makeStructureType(parent, newFieldTuple, pack, isAnonymous):
+    ''' builds a structure type that extends the given parent by one field '''
+    name = newFieldTuple[0]
+
+    if hasattr(parent, '_all_fields_'):
+        parentFields = parent._all_fields_
+    else:
+        # a hand-written parent keeps its fields in _fields_ instead
+        parentFields = tuple(_collectMroFields(parent))
+
+    class TmpStructure(parent):
+        ''' this tmp structure inherits from parent to essentially add one field '''
+        _pack_ = pack
+
+        # handle anonymous (only make anonymous if this field is listed)
+        _anonymous_ = [name] if isAnonymous else []
+        _fields_ = [
+                newFieldTuple
+            ]
+
+        # running flattened field list so nobody has to walk the mro later
+        _all_fields_ = parentFields + (newFieldTuple,)
+
+    TmpStructure._cached_size = _ctypesSizeof(TmpStructure)
+    return TmpStructure
+
+@lru_cache(maxsize=4096)
+def _makeStructureTypeCached(parent, newFieldTuple, pack, isAnonymous):
+    ''' cached _makeStructureType()... ctypes layout computation is the expensive part of
+        generating these classes, so reuse them when the same schema is parsed repeatedly '''
+    return _makeStructureType(parent, newFieldTuple, pack, isAnonymous)
+
+def _makeFlatStructureType(fieldsTuple, pack, anonymousTuple):
+    ''' builds a flat structure type with all of the given (already resolved) fields at once '''
+    class BuildStructure(BaseStructure):
+        ''' structure with every field resolved... built in one shot '''
+        _pack_ = pack
+        _anonymous_ = list(anonymousTuple)
+        _fields_ = list(fieldsTuple)
+        _all_fields_ = tuple(fieldsTuple)
+
+    BuildStructure._cached_size = _ctypesSizeof(BuildStructure)
+    return BuildStructure
+
+@lru_cache(maxsize=4096)
+def _makeFlatStructureTypeCached(fieldsTuple, pack, anonymousTuple):
+    ''' cached _makeFlatStructureType()... same resolved schema -> same class '''
+    return _makeFlatStructureType(fieldsTuple, pack, anonymousTuple)
+
+def _getFlatStructureType(fieldsTuple, pack, anonymousTuple):
+    ''' gets a flat structure type for already-resolved fields, via the cache when all
+        field tuples are plain (special tuple types may carry extra attributes) '''
+    if all(type(f) is tuple for f in fieldsTuple):
+        return _makeFlatStructureTypeCached(fieldsTuple, pack, anonymousTuple)
+    return _makeFlatStructureType(fieldsTuple, pack, anonymousTuple)
+
+def _rebuildFieldTuple(fieldTuple, calculatedDynamicType):
+    ''' swaps the function in a (name, function) fieldTuple for its calculated type,
+        preserving the tuple's type and anything extra hanging off of it '''
+    name = fieldTuple[0]
+    tupleType = type(fieldTuple)
+
+    # handle if the tupleType __new__ wants a tuple or params as tuple fields
+    try:
+        newFieldTuple = tupleType(name, calculatedDynamicType)
+    except TypeError:
+        ''' TypeError: tuple() takes at most 1 argument (2 given) '''
+        newFieldTuple = tupleType((name, calculatedDynamicType))
+
+    # if the tupleType is inherited from tuple, bring over things that may have been on that object
+    if hasattr(newFieldTuple, '__dict__'):
+        newFieldTuple.__dict__.update(fieldTuple.__dict__)
+
+    return newFieldTuple
+
+@lru_cache(maxsize=None)
+def _promoteToBaseStructure(parent):
+    ''' mixes BaseStructure into a plain Structure parent (cached), so children generated
+        from it get .fill() without needing a second wrapper class per call '''
+    class TmpStructure(parent, BaseStructure):
+        pass
+
+    TmpStructure._cached_size = _ctypesSizeof(TmpStructure)
+    return TmpStructure
+
+@lru_cache(maxsize=None)
+def _getBaseStructureType(pack):
+    ''' gets (and caches) an empty BaseStructure child with the given pack '''
+    class BuildStructure(BaseStructure):
+        ''' a base structure-like instance to set a given pack '''
+        _pack_ = pack
+
+    BuildStructure._cached_size = _ctypesSizeof(BuildStructure)
+    return BuildStructure
+
+def getStructureType(fieldTuple, buffer, parent=BaseStructure, pack=1, anonymous=None, parentInstance=None):
     '''
     adds the fieldTuple to the given parent using the buffer.
 
     if fieldTuple[1] is a function, it must have self (a structure up to just before now) and
                                         the buffer at this point onward as parameters.
                                             They can be used by a lambda to calculate out this field's size.
+
+    if the caller already has a filled instance of parent, it can be passed as parentInstance
+        to skip re-filling one from the buffer here.
     '''
 
     if anonymous is None:
         anonymous = []
 
+    if not issubclass(parent, BaseStructure):
+        # make sure we inherit from BaseStructure to get us the .fill() method...
+        #   done up front (and cached) so only one class gets created below
+        parent = _promoteToBaseStructure(parent)
+
     if len(fieldTuple) != 2:
         # todo... maybe?:
         # If we see that this is a bitfield, look ahead to combine other bitfields to complete
@@ -74,119 +299,415 @@ def getStructureType(fieldTuple, buffer, parent=BaseStructure, pack=1, anonymous
 
     name, typeOrFunction = fieldTuple
 
-    if inspect.isfunction(typeOrFunction):
+    if _isDynamicField(typeOrFunction):
         # function was given... evaluate dynamically
         #  if a function is given it will have self (struct to this point) and buffer as params
-        parentFilledTillNow = parent().fill(buffer)
-        remainderOfBuffer = buffer[sizeof(parent):]
+        parentSize = sizeof(parent)
+        if parentInstance is None:
+            parentInstance = parent().fill(buffer)
+        remainderOfBuffer = buffer[parentSize:]
 
         if len(remainderOfBuffer) == 0:
             raise BufferSizeInsufficient("not enough remaining space to process: %s (remaining size == 0)" % name)
 
         # now call the function with what we have to get the actual tuple we need here
-        calculatedDynamicType = typeOrFunction(parentFilledTillNow, remainderOfBuffer)
-
-        if len(remainderOfBuffer) < sizeof(calculatedDynamicType()):
-            raise BufferSizeInsufficient("not enough remaining space to process: %s... need %d bytes, have %d bytes" % (name, sizeof(calculatedDynamicType()), len(remainderOfBuffer)))
+        calculatedDynamicType = typeOrFunction(parentInstance, remainderOfBuffer)
 
-        tupleType = type(fieldTuple)
+        # sizeof() takes the type directly... no need to instantiate just to measure
+        calculatedDynamicSize = sizeof(calculatedDynamicType)
+        if len(remainderOfBuffer) < calculatedDynamicSize:
+            raise BufferSizeInsufficient("not enough remaining space to process: %s... need %d bytes, have %d bytes" % (name, calculatedDynamicSize, len(remainderOfBuffer)))
 
-        # handle if the tupleType __new__ wants a tuple or params as tuple fields
-        try:
-            newFieldTuple = tupleType(name, calculatedDynamicType)
-        except TypeError:
-            ''' TypeError: tuple() takes at most 1 argument (2 given) '''
-            newFieldTuple = tupleType((name, calculatedDynamicType))
-
-        # if the tupleType is inherited from tuple, bring over things that may have been on that object
-        if hasattr(newFieldTuple, '__dict__'):
-            newFieldTuple.__dict__.update(fieldTuple.__dict__)
+        newFieldTuple = _rebuildFieldTuple(fieldTuple, calculatedDynamicType)
 
     else:
         newFieldTuple = fieldTuple
 
-    class TmpStructure(parent):
-        ''' this tmp structure inherits from parent to essentially add one field '''
-        _pack_ = pack
-
-        # handle anonymous (only make anonymous if this field is listed)
-        _anonymous_ = [] if name not in anonymous else [name]
-        _fields_ = [
-                newFieldTuple
-            ]
-
-    if not issubclass(parent, BaseStructure):
-        # make sure we inherit from BaseStructure
-        #   to get us the .fill() method.
-        class TmpStructure(TmpStructure, BaseStructure):
-            pass
+    if type(newFieldTuple) is tuple:
+        TmpStructure = _makeStructureTypeCached(parent, newFieldTuple, pack, name in anonymous)
+    else:
+        # special tuple types may carry extra attributes... don't let two of those
+        #   with equal values share a cached class
+        TmpStructure = _makeStructureType(parent, newFieldTuple, pack, name in anonymous)
 
     return TmpStructure
 
+def getAllFields(structOrType):
+    '''
+    gets the flattened list of all fields for a structure (or structure type).
+    generated structures carry _all_fields_ so this is O(1)... anything else falls
+    back to collecting _fields_ across the mro.
+    '''
+    typ = structOrType if isinstance(structOrType, type) else type(structOrType)
+
+    # only trust _all_fields_ if no class below where it was computed adds its own
+    #   _fields_ (a user subclass of a generated type would make it stale)
+    for klass in typ.mro():
+        if '_all_fields_' in klass.__dict__:
+            return list(klass._all_fields_)
+        if '_fields_' in klass.__dict__:
+            break
+
+    return _collectMroFields(typ)
+
+def _isUsableNamedtupleName(name):
+    ''' True if a field name can be a namedtuple attribute. ctypes allows names (like
+        _reserved, or keywords) that namedtuple rejects '''
+    return name.isidentifier() and not name.startswith('_') and not keyword.iskeyword(name)
+
+@lru_cache(maxsize=1024)
+def _getScalarPrefixReader(fieldsTuple):
+    ''' builds (and caches) a reader for an all-scalar pack=1 field prefix. The header
+        comes back as a namedtuple from one precompiled struct.Struct call... no scratch
+        ctypes structure needs to exist at all for the common length-field-header case '''
+    # '=' is native order with standard sizes and no alignment... same semantics the
+    #   pack=1 ctypes scratch structure would have on any platform
+    unpacker = struct.Struct('=' + ''.join(_CTYPE_TO_STRUCT_FORMAT[f[1]] for f in fieldsTuple))
+    headerType = namedtuple('ScalarHeader', [f[0] for f in fieldsTuple])
+    return unpacker, headerType
+
 def getDynamicStructureType(fields, buffer=None, pack=1, anonymous=None, docstring=''):
     '''
     gets a self-defining structure type with the given fields, buffer, pack.
+
+    all dynamic fields get resolved first, then the final type is built in one shot
+    instead of as one nested subclass per field. The self handed to a dynamic field's
+    function exposes every prior field by attribute... when the prior fields are all
+    plain scalars it's a lightweight header view read straight off the buffer, otherwise
+    it's a filled (cached) scratch structure.
     '''
     if anonymous is None:
         anonymous = []
 
-    class BuildStructure(BaseStructure):
-        ''' a base structure-like instance to set a given pack '''
-        _pack_ = pack
-
     if buffer is None:
         buffer = []
 
-    for idx, fieldTuple in enumerate(fields):
-        BuildStructure = getStructureType(fieldTuple, buffer, BuildStructure, pack=pack, anonymous=anonymous)
+    if not isinstance(buffer, memoryview):
+        # memoryview slices are O(1) and copy nothing, unlike list slices
+        buffer = memoryview(bytes(buffer))
+
+    resolvedFields = []
+    bufferLength = len(buffer)
+
+    # running byte offset of the next field. With pack == 1 there's no padding, so once
+    #   the first dynamic field sets it, later fields keep it going with plain addition
+    #   instead of asking ctypes to re-measure the scratch structure
+    offset = None
+
+    for fieldTuple in fields:
+        if len(fieldTuple) != 2:
+            # see getStructureType for the todo on this
+            raise BitFieldUnsupportedError('bit fields are not supported')
+
+        name, typeOrFunction = fieldTuple
+        fieldSize = None
+
+        if _isDynamicField(typeOrFunction):
+            if pack == 1 and all(type(f) is tuple and f[1] in _CTYPE_TO_STRUCT_FORMAT and _isUsableNamedtupleName(f[0]) for f in resolvedFields):
+                # all-scalar prefix: read the header fields straight off the buffer with
+                #   one precompiled unpack... no scratch structure needed
+                unpacker, headerType = _getScalarPrefixReader(tuple(resolvedFields))
+                if offset is None:
+                    offset = unpacker.size
+
+                # pure arithmetic bounds check... no slicing just to measure
+                remainingLength = bufferLength - offset
+                if remainingLength <= 0:
+                    raise BufferSizeInsufficient("not enough remaining space to process: %s (remaining size == 0)" % name)
+
+                selfSoFar = headerType._make(unpacker.unpack_from(buffer))
+            else:
+                # build a scratch structure of everything resolved so far for the function to read
+                anonymousSoFar = tuple(f[0] for f in resolvedFields if f[0] in anonymous)
+                scratchType = _getFlatStructureType(tuple(resolvedFields), pack, anonymousSoFar)
+
+                if offset is None:
+                    offset = sizeof(scratchType)
+
+                remainingLength = bufferLength - offset
+                if remainingLength <= 0:
+                    raise BufferSizeInsufficient("not enough remaining space to process: %s (remaining size == 0)" % name)
+
+                selfSoFar = scratchType().fill(buffer)
+
+            calculatedDynamicType = typeOrFunction(selfSoFar, buffer[offset:])
+
+            calculatedDynamicSize = sizeof(calculatedDynamicType)
+            if remainingLength < calculatedDynamicSize:
+                raise BufferSizeInsufficient("not enough remaining space to process: %s... need %d bytes, have %d bytes" % (name, calculatedDynamicSize, remainingLength))
+
+            fieldTuple = _rebuildFieldTuple(fieldTuple, calculatedDynamicType)
+            fieldSize = calculatedDynamicSize
+
+        if offset is not None:
+            if pack == 1:
+                offset += fieldSize if fieldSize is not None else sizeof(typeOrFunction)
+            else:
+                # alignment padding would make the running sum wrong... re-measure next time
+                offset = None
+
+        resolvedFields.append(fieldTuple)
+
+    anonymousResolved = tuple(f[0] for f in resolvedFields if f[0] in anonymous)
+    BuildStructure = _getFlatStructureType(tuple(resolvedFields), pack, anonymousResolved)
+
+    if docstring:
+        # the built classes may be shared via the cache, so put the docstring on a
+        #   fresh (field-less) child instead of mutating what we got back
+        class BuildStructure(BuildStructure):
+            __doc__ = inspect.cleandoc(docstring)
+
+        BuildStructure._cached_size = _ctypesSizeof(BuildStructure)
 
-    BuildStructure.__doc__ = inspect.cleandoc(docstring)
     return BuildStructure
 
-def getDynamicStructure(fields, buffer=None, pack=1, anonymous=None, docstring=''):
+def getDynamicStructure(fields, buffer=None, pack=1, anonymous=None, docstring='', zeroCopy=False):
     '''
     gets a self-defining structure with the given fields, buffer, pack.
+
+    with zeroCopy=True and a writable buffer (e.g. a bytearray), the returned structure
+    aliases the caller's buffer via from_buffer instead of copying it... writes through
+    the structure land in the buffer and vice-versa, and no bytes get moved at all.
     '''
+    if buffer is not None and not isinstance(buffer, memoryview):
+        try:
+            # bytes/bytearray/array.array/etc. can be viewed without copying
+            buffer = memoryview(buffer).cast('B')
+        except TypeError:
+            buffer = memoryview(bytes(buffer))
+
     structType = getDynamicStructureType(fields, buffer, pack, anonymous, docstring)
+    structSize = sizeof(structType)
+
+    if zeroCopy:
+        if buffer is None or buffer.readonly:
+            raise DynamicStructureError('zeroCopy requires a writable buffer (e.g. a bytearray)')
+        if len(buffer) < structSize:
+            raise BufferSizeInsufficient("not enough buffer to alias: need %d bytes, have %d bytes" % (structSize, len(buffer)))
+        return structType.from_buffer(buffer)
+
+    if len(buffer) >= structSize:
+        # one C-level memcpy... skips instantiating a zero-init struct just to fill it
+        return structType.from_buffer_copy(buffer[:structSize])
+
+    # short buffer: keep the zero-padded fill behavior
     return structType().fill(buffer)
 
+# ctypes scalar -> struct module format character (standard sizes, no alignment)
+_CTYPE_TO_STRUCT_FORMAT = {
+    c_uint8:  'B',
+    c_int8:   'b',
+    c_uint16: 'H',
+    c_int16:  'h',
+    c_uint32: 'I',
+    c_int32:  'i',
+    c_uint64: 'Q',
+    c_int64:  'q',
+    c_float:  'f',
+    c_double: 'd',
+}
+
+def _getStructUnpackParser(fields, pack):
+    ''' builds a struct.Struct-based parse function for a flat, all-scalar, pack == 1
+        schema... the struct module's compiled unpackers beat ctypes' field descriptors
+        for read-mostly use. Returns None if the schema doesn't qualify '''
+    if pack != 1:
+        # struct's '=' formats can't express other ctypes pack values
+        return None
+
+    names = []
+    formats = []
+    for fieldTuple in fields:
+        if len(fieldTuple) != 2 or fieldTuple[1] not in _CTYPE_TO_STRUCT_FORMAT:
+            return None
+        if not _isUsableNamedtupleName(fieldTuple[0]):
+            # namedtuple can't hold this name... let the ctypes path handle it
+            return None
+        names.append(fieldTuple[0])
+        formats.append(_CTYPE_TO_STRUCT_FORMAT[fieldTuple[1]])
+
+    # native order ('=') so values match what the ctypes fallback branch would decode
+    unpacker = struct.Struct('=' + ''.join(formats))
+    resultType = namedtuple('PackedStruct', names)
+
+    def parse(buffer):
+        ''' unpacks every field with one precompiled struct.Struct call '''
+        if isinstance(buffer, list):
+            buffer = bytes(buffer)
+        return resultType._make(unpacker.unpack_from(buffer))
+
+    return parse
+
+def getDynamicStructureParser(fields, pack=1, anonymous=None, docstring='', useStructUnpack=False):
+    '''
+    compiles the given fields once into a parse(buffer) function, for parsing many
+    buffers with the same schema.
+
+    a schema without dynamic fields resolves its structure type exactly once, up front...
+    parse() is then just a from_buffer_copy. Schemas with dynamic fields still resolve
+    per buffer (the sizes live in the buffer), but same-shaped buffers hit the class
+    cache and skip all of the ctypes layout work.
+
+    with useStructUnpack=True, a flat all-scalar pack=1 schema parses to a namedtuple
+    via one precompiled struct.Struct call instead of a ctypes Structure... faster for
+    read-mostly consumers that don't need the ctypes object.
+    '''
+    fields = list(fields)
+
+    hasDynamicFields = any(len(f) == 2 and _isDynamicField(f[1]) for f in fields)
+
+    if not hasDynamicFields and useStructUnpack:
+        structUnpackParse = _getStructUnpackParser(fields, pack)
+        if structUnpackParse is not None:
+            return structUnpackParse
+
+    if not hasDynamicFields:
+        staticType = getDynamicStructureType(fields, None, pack, anonymous, docstring)
+        staticSize = sizeof(staticType)
+
+        def parse(buffer):
+            ''' parses one buffer into the precompiled structure type '''
+            if not isinstance(buffer, memoryview):
+                buffer = memoryview(bytes(buffer))
+
+            if len(buffer) >= staticSize:
+                return staticType.from_buffer_copy(buffer[:staticSize])
+
+            return staticType().fill(buffer)
+    else:
+        def parse(buffer):
+            ''' parses one buffer, resolving the dynamic fields against it '''
+            return getDynamicStructure(fields, buffer, pack, anonymous, docstring)
+
+    return parse
+
 def getArrayOfDynamicStructuresType(buffer, fieldsOrStructTypePickFunction, maxArrayLength, pack=1):
     ''' takes in a buffer, and a list of fields. The fields will make up a dynamic structure to be continually
     used in an array-like thing of those structs. If a function is given to fieldsOrStructTypePickFunction, it
     should take in a buffer and return a type to use at this point. It can also return False if there isn't
     enough room to process the next element '''
 
+    if not isinstance(buffer, memoryview):
+        # each element advances via buffer = buffer[sizeof(ds):]... memoryview makes those
+        #   slices O(1) views instead of list copies
+        buffer = memoryview(bytes(buffer))
+
+    usesPickFunction = _isDynamicField(fieldsOrStructTypePickFunction)
+
+    staticElementType = None
+    if not usesPickFunction and not any(len(f) == 2 and _isDynamicField(f[1]) for f in fieldsOrStructTypePickFunction):
+        # homogeneous case: a static list of fields means every element is the same
+        #   type... resolve it once instead of per element
+        staticElementType = getDynamicStructureType(fieldsOrStructTypePickFunction, pack=pack)
+
     curatedFieldsList = []
     for idx in range(maxArrayLength):
-        if inspect.isfunction(fieldsOrStructTypePickFunction):
+        if usesPickFunction:
             # function to find list of fields given
             ds = fieldsOrStructTypePickFunction(buffer)
             if not ds:
                 break
+        elif staticElementType is not None:
+            ds = staticElementType
         else:
             # list of fields given.
             ds = getDynamicStructureType(fieldsOrStructTypePickFunction, buffer=buffer, pack=pack)
         curatedFieldsList.append(('_ArrayItem_%d' % idx, ds,))
         buffer = buffer[sizeof(ds):]
 
+    return _makeArrayStructureType(tuple(curatedFieldsList), pack)
+
+@lru_cache(maxsize=1024)
+def _makeArrayStructureType(curatedFieldsTuple, pack):
+    ''' builds (and caches) the array-like structure holding the given element types...
+        two arrays that resolve to the same element types share one class '''
+    numItems = len(curatedFieldsTuple)
+
+    # per-index lookup table built once at class build time... getArrayIndex() then
+    #   just indexes it instead of formatting '_ArrayItem_%d' on every call
+    itemNames = tuple(name for name, _ in curatedFieldsTuple)
+
     class TmpArrayStructure(BaseStructure):
         ''' structure that will be returned. Main user-entry point is getArrayIndex() '''
         _pack_ = pack
-        _fields_ = curatedFieldsList
+        _fields_ = list(curatedFieldsTuple)
 
         def __len__(self):
             ''' returns number of items in this struct's array '''
-            return len(curatedFieldsList)
+            return numItems
 
         def getArrayIndex(self, idx):
             ''' user-facing way to get items in the array index '''
-            if idx >= len(self) or idx < 0:
+            if not 0 <= idx < numItems:
                 raise IndexError("%d is out of bounds" % idx)
-            return getattr(self, '_ArrayItem_%d' % idx)
+            return getattr(self, itemNames[idx])
 
+    TmpArrayStructure._cached_size = _ctypesSizeof(TmpArrayStructure)
     return TmpArrayStructure
 
+def getSoAArrayOfDynamicStructuresType(buffer, fields, arrayLength, pack=1):
+    ''' structure-of-arrays companion to getArrayOfDynamicStructuresType() for a static
+    (non-dynamic) list of fields. Instead of laying out arrayLength records back to back,
+    the returned type holds one contiguous column per field... so iterating a single
+    field across every element only touches that column's bytes instead of striding over
+    whole records. fill() transposes from the record-major buffer. getColumn() and
+    getArrayIndex() are the user-entry points '''
+
+    for fieldTuple in fields:
+        if len(fieldTuple) != 2:
+            raise BitFieldUnsupportedError('bit fields are not supported')
+        if _isDynamicField(fieldTuple[1]):
+            raise DynamicStructureError('SoA layout requires static fields (dynamic sizes vary per element)')
+
+    elementType = getDynamicStructureType(fields, buffer=buffer, pack=pack)
+    elementSize = sizeof(elementType)
+
+    class TmpSoAStructure(BaseStructure):
+        ''' SoA layout... one contiguous column per field of the element structure '''
+        _pack_ = pack
+        _fields_ = [(name, fieldType * arrayLength) for name, fieldType in fields]
+
+        def __len__(self):
+            ''' returns number of elements per column '''
+            return arrayLength
+
+        def fill(self, buffer):
+            ''' transposes the record-major buffer into the per-field columns '''
+            if not isinstance(buffer, memoryview):
+                buffer = memoryview(bytes(buffer))
+
+            for idx in range(arrayLength):
+                element = elementType().fill(buffer[idx * elementSize:])
+                for name, _ in fields:
+                    getattr(self, name)[idx] = getattr(element, name)
+            return self
+
+        def getColumn(self, name):
+            ''' gets the contiguous ctypes array holding every element's value for this field '''
+            return getattr(self, name)
+
+        def getArrayIndex(self, idx):
+            ''' gets one logical element back as a filled element structure '''
+            if not 0 <= idx < len(self):
+                raise IndexError("%d is out of bounds" % idx)
+
+            element = elementType()
+            for name, _ in fields:
+                setattr(element, name, getattr(self, name)[idx])
+            return element
+
+    TmpSoAStructure._cached_size = _ctypesSizeof(TmpSoAStructure)
+    return TmpSoAStructure
+
+def getSoAArrayOfDynamicStructures(buffer, fields, arrayLength, pack=1):
+    ''' calls getSoAArrayOfDynamicStructuresType() then instantiates it with the buffer '''
+    s = getSoAArrayOfDynamicStructuresType(buffer, fields, arrayLength, pack)
+    return s().fill(buffer)
+
 def getArrayOfDynamicStructures(buffer, fieldsOrStructTypePickFunction, maxArrayLength, pack=1):
     ''' calls getArrayOfDynamicStructuresType() then instantiates it with the buffer '''
+    if not isinstance(buffer, memoryview):
+        buffer = memoryview(bytes(buffer))
+
     s = getArrayOfDynamicStructuresType(buffer, fieldsOrStructTypePickFunction, maxArrayLength, pack)
     return s().fill(buffer)
\ No newline at end of file
@@ -1,5 +1,7 @@
 ''' tests for dynamic_structure.py '''
 
+import array
+
 import pytest
 
 from dynamic_structures import *
@@ -67,7 +69,7 @@ def test_get_dynamic_structure_not_enough_space():
         struct = getDynamicStructure(fields=[
                 ('NumElements', c_uint8),
                 ('Elements',    lambda self, buffer: self.NumElements * c_uint8),
-            ], buffer=[10, 0, 1, 2, 3, 4, 5, 6, 7, 8]
+            ], buffer=bytes([10, 0, 1, 2, 3, 4, 5, 6, 7, 8])
         )
 
 def test_get_dynamic_structure_enough_space():
@@ -76,7 +78,7 @@ def test_get_dynamic_structure_enough_space():
             ('NumElements', c_uint8),
             ('Elements',    lambda self, buffer: self.NumElements * c_uint8),
             ('Post',        c_uint8),
-        ], buffer=[10, 0, 1, 2, 3, 4, 5, 6, 7, 8, 9, 99], docstring="DOCSTR_TEST", pack=1
+        ], buffer=bytes([10, 0, 1, 2, 3, 4, 5, 6, 7, 8, 9, 99]), docstring="DOCSTR_TEST", pack=1
     )
 
     assert struct.NumElements == 10
@@ -92,7 +94,7 @@ def test_get_dynamic_structure_enough_space_alt_pack():
             ('NumElements', c_uint8),
             # pack 4 inserts 3 bytes here.
             ('AfterPad',    c_uint32),
-        ], buffer=[10, 0, 1, 2, 3, 4, 5, 6, 7, 8, 9], docstring="DOCSTR_TEST", pack=4
+        ], buffer=bytes([10, 0, 1, 2, 3, 4, 5, 6, 7, 8, 9]), docstring="DOCSTR_TEST", pack=4
     )
 
     assert struct.NumElements == 10
@@ -101,10 +103,58 @@ def test_get_dynamic_structure_enough_space_alt_pack():
     assert struct._pack_ == 4
     assert sizeof(struct) == 8
 
+def test_get_dynamic_structure_zero_copy():
+    ''' tests getDynamicStructure() zeroCopy aliasing into a caller's bytearray '''
+    buffer = bytearray([2, 7, 8])
+    struct = getDynamicStructure(fields=[
+            ('NumElements', c_uint8),
+            ('Elements',    lambda self, buffer: self.NumElements * c_uint8),
+        ], buffer=buffer, zeroCopy=True
+    )
+
+    assert struct.NumElements == 2
+    assert list(struct.Elements) == [7, 8]
+
+    # aliasing goes both ways
+    struct.Elements[0] = 99
+    assert buffer[1] == 99
+    buffer[2] = 55
+    assert struct.Elements[1] == 55
+
+def test_get_dynamic_structure_zero_copy_needs_writable():
+    ''' tests getDynamicStructure() zeroCopy raises on read-only buffers '''
+    with pytest.raises(DynamicStructureError):
+        getDynamicStructure(fields=[('A', c_uint8)], buffer=bytes([1]), zeroCopy=True)
+
+def test_get_dynamic_structure_multiple_dynamic_fields():
+    ''' tests getDynamicStructure() with back to back dynamic fields (like the docstring example) '''
+    struct = getDynamicStructure(fields=[
+            ('arraySize', c_uint8),
+            ('arrayA',    lambda self, buffer: c_uint8  * self.arraySize),
+            ('arrayB',    lambda self, buffer: c_uint16 * self.arraySize),
+        ], buffer=bytes([2, 10, 11, 1, 0, 2, 0]), pack=1
+    )
+
+    assert struct.arraySize == 2
+    assert list(struct.arrayA) == [10, 11]
+    assert list(struct.arrayB) == [1, 2]
+    assert sizeof(struct) == 7
+
+def test_get_dynamic_structure_underscore_header_field():
+    ''' tests that header field names namedtuple can't take (underscore-prefixed) still parse '''
+    struct = getDynamicStructure(fields=[
+            ('_numElements', c_uint8),
+            ('Elements',     lambda self, buffer: self._numElements * c_uint8),
+        ], buffer=bytes([2, 5, 6]), pack=1
+    )
+
+    assert struct._numElements == 2
+    assert list(struct.Elements) == [5, 6]
+
 def test_get_array_of_dynamic_structures_type_not_dynamic():
     ''' tests getArrayOfDynamicStructuresType to make sure it works with non-dynamic fields
         Also happens to test getArrayOfDynamicStructures() while here'''
-    buffer = [a for a in range(255)]
+    buffer = bytes(range(255))
 
     ARRAY_LIKE_FIELDS = [
         ('A', c_uint8),
@@ -149,7 +199,7 @@ def test_get_array_of_dynamic_structures_type_not_dynamic():
 
 def test_get_array_of_dynamic_structures_type_dynamic():
     ''' tests getArrayOfDynamicStructuresType to make sure it works with dynamic fields'''
-    buffer = [a for a in range(255)]
+    buffer = bytes(range(255))
 
     ARRAY_LIKE_FIELDS = [
         ('NumElements', c_uint8),
@@ -178,7 +228,7 @@ def test_get_array_of_dynamic_structures_type_dynamic():
 def test_get_array_of_dynamic_structures_type_dynamic_with_struct_pick_function():
     ''' tests getArrayOfDynamicStructuresType to make sure it works with dynamic fields and if we give a struct pick function
     instead of giving in a list of fields '''
-    buffer = [a for a in range(255)]
+    buffer = bytes(range(255))
 
     def structPickFunction(buffer):
         if buffer[0] == 0:
@@ -211,6 +261,234 @@ def test_get_array_of_dynamic_structures_type_dynamic_with_struct_pick_function(
 
     assert len(inst) == 2
 
+def test_get_dynamic_structure_parser_static():
+    ''' tests getDynamicStructureParser() with a static-only schema '''
+    parse = getDynamicStructureParser(fields=[
+            ('A', c_uint8),
+            ('B', c_uint16),
+        ], pack=1
+    )
+
+    structA = parse(bytes([1, 2, 3]))
+    structB = parse(bytes([9, 8, 7]))
+
+    assert structA.A == 1
+    assert structA.B == 0x0302
+    assert structB.A == 9
+
+    # the schema compiles to exactly one type
+    assert type(structA) is type(structB)
+
+def test_get_dynamic_structure_parser_struct_unpack():
+    ''' tests getDynamicStructureParser() with useStructUnpack for a flat scalar schema '''
+    parse = getDynamicStructureParser(fields=[
+            ('A', c_uint8),
+            ('B', c_uint32),
+        ], useStructUnpack=True
+    )
+
+    s = parse(bytes([1, 2, 3, 4, 5]))
+    assert s.A == 1
+    assert s.B == 0x05040302
+
+    # list buffers still work
+    s = parse([9, 0, 0, 0, 0])
+    assert s.A == 9
+
+    # schemas that don't qualify (non pack=1) fall back to the ctypes path
+    parse = getDynamicStructureParser(fields=[
+            ('A', c_uint8),
+            ('B', c_uint32),
+        ], pack=4, useStructUnpack=True
+    )
+    s = parse(bytes([1, 0, 0, 0, 2, 3, 4, 5]))
+    assert isinstance(s, Structure)
+    assert s.A == 1
+    assert s.B == 0x05040302
+
+    # names namedtuple can't take (underscore-prefixed) fall back to the ctypes path too
+    parse = getDynamicStructureParser(fields=[
+            ('_a', c_uint8),
+            ('b',  c_uint32),
+        ], useStructUnpack=True
+    )
+    s = parse(bytes([1, 2, 3, 4, 5]))
+    assert isinstance(s, Structure)
+    assert s._a == 1
+    assert s.b == 0x05040302
+
+def test_get_dynamic_structure_parser_dynamic():
+    ''' tests getDynamicStructureParser() with a dynamic field '''
+    parse = getDynamicStructureParser(fields=[
+            ('NumElements', c_uint8),
+            ('Elements',    lambda self, buffer: self.NumElements * c_uint8),
+        ]
+    )
+
+    struct = parse(bytes([3, 10, 11, 12]))
+    assert struct.NumElements == 3
+    assert list(struct.Elements) == [10, 11, 12]
+
+    with pytest.raises(BufferSizeInsufficient):
+        parse(bytes([3, 10]))
+
+def test_fill_accepts_buffer_protocol_objects():
+    ''' tests fill() with the various buffer flavors: list, bytes, bytearray, memoryview, array.array '''
+    class Tmp(BaseStructure):
+        _pack_ = 1
+        _fields_ = [('A', c_uint8), ('B', c_uint32)]
+
+    raw = [28, 1, 2, 3, 4]
+    for buffer in (raw, bytes(raw), bytearray(raw), memoryview(bytes(raw)), array.array('B', raw)):
+        s = Tmp().fill(buffer)
+        assert s.A == 28
+        assert s.B == 0x04030201
+
+def test_view_aliases_writable_buffer():
+    ''' tests view() aliases a writable buffer instead of copying it '''
+    class Tmp(BaseStructure):
+        _pack_ = 1
+        _fields_ = [('A', c_uint8), ('B', c_uint8)]
+
+    buffer = bytearray([5, 6])
+    inst = Tmp.view(buffer)
+
+    assert inst.A == 5
+    assert inst.B == 6
+
+    inst.A = 50
+    assert buffer[0] == 50
+    buffer[1] = 60
+    assert inst.B == 60
+
+    # read-only buffers can't be aliased
+    with pytest.raises(TypeError):
+        Tmp.view(bytes([1, 2]))
+
+def test_acquire_release_pool():
+    ''' tests acquire()/release() reuse instances instead of reallocating '''
+    class Tmp(BaseStructure):
+        _pack_ = 1
+        _fields_ = [('A', c_uint8), ('B', c_uint8)]
+
+    first = Tmp.acquire(bytes([1, 2]))
+    assert first.A == 1
+    assert first.B == 2
+
+    first.release()
+    second = Tmp.acquire(bytes([3, 4]))
+
+    # same object came back out of the pool, refilled
+    assert second is first
+    assert second.A == 3
+    assert second.B == 4
+
+    # short buffers still see zeroed trailing bytes on a reused instance
+    second.release()
+    third = Tmp.acquire(bytes([9]))
+    assert third.A == 9
+    assert third.B == 0
+
+def test_get_bytes_view_and_field_memoryviews():
+    ''' tests getBytesView() and that fields can be viewed zero-copy via memoryview '''
+    struct = getDynamicStructure(fields=[
+            ('NumElements', c_uint8),
+            ('Elements',    lambda self, buffer: self.NumElements * c_uint8),
+        ], buffer=bytes([3, 7, 8, 9])
+    )
+
+    view = struct.getBytesView()
+    assert view.tobytes() == bytes([3, 7, 8, 9])
+
+    # the view is writable and aliases the structure
+    view[1] = 77
+    assert struct.Elements[0] == 77
+
+    # ctypes array fields speak the buffer protocol directly
+    elementsView = memoryview(struct.Elements)
+    assert bytes(elementsView) == bytes([77, 8, 9])
+
+def test_get_all_fields():
+    ''' tests getAllFields() gives the flattened field list for generated structures '''
+    struct = getDynamicStructure(fields=[
+            ('NumElements', c_uint8),
+            ('Elements',    lambda self, buffer: self.NumElements * c_uint8),
+        ], buffer=[2, 5, 6]
+    )
+
+    allFields = getAllFields(struct)
+    assert allFields[0] == ('NumElements', c_uint8)
+    assert allFields[1][0] == 'Elements'
+    assert len(allFields) == 2
+
+    # works on the type itself too
+    assert getAllFields(type(struct)) == allFields
+
+def test_get_all_fields_non_generated():
+    ''' tests getAllFields() falls back to the mro for regular Structures '''
+    class Tmp(Structure):
+        _fields_ = [('A', c_uint32)]
+
+    class Tmp2(Tmp):
+        _fields_ = [('B', c_uint8)]
+
+    assert getAllFields(Tmp2) == [('A', c_uint32), ('B', c_uint8)]
+
+def test_get_all_fields_with_field_bearing_parent():
+    ''' tests getAllFields() keeps a hand-written parent's fields when extending it '''
+    class Tmp(Structure):
+        _pack_ = 1
+        _fields_ = [('A', c_uint8)]
+
+    structureType = getStructureType(('B', c_uint8), [1, 2], parent=Tmp)
+    assert getAllFields(structureType) == [('A', c_uint8), ('B', c_uint8)]
+
+def test_get_all_fields_subclass_of_generated():
+    ''' tests getAllFields() doesn't report a stale list for a subclass that adds fields '''
+    generatedType = getDynamicStructureType([('A', c_uint8)])
+
+    class Sub(generatedType):
+        _pack_ = 1
+        _fields_ = [('B', c_uint8)]
+
+    assert getAllFields(Sub) == [('A', c_uint8), ('B', c_uint8)]
+
+def test_get_soa_array_of_dynamic_structures():
+    ''' tests getSoAArrayOfDynamicStructures() transposes records into columns '''
+    buffer = [a for a in range(255)]
+
+    ARRAY_LIKE_FIELDS = [
+        ('A', c_uint8),
+        ('B', c_uint8),
+    ]
+
+    inst = getSoAArrayOfDynamicStructures(buffer, ARRAY_LIKE_FIELDS, arrayLength=3)
+
+    assert list(inst.getColumn('A')) == [0, 2, 4]
+    assert list(inst.getColumn('B')) == [1, 3, 5]
+
+    assert inst.getArrayIndex(0).A == 0
+    assert inst.getArrayIndex(0).B == 1
+    assert inst.getArrayIndex(2).A == 4
+    assert inst.getArrayIndex(2).B == 5
+
+    with pytest.raises(IndexError):
+        inst.getArrayIndex(3)
+
+    with pytest.raises(IndexError):
+        inst.getArrayIndex(-2)
+
+    assert sizeof(inst) == 6
+    assert len(inst) == 3
+
+def test_get_soa_array_rejects_dynamic_fields():
+    ''' tests getSoAArrayOfDynamicStructuresType() raises if a dynamic field is given '''
+    with pytest.raises(DynamicStructureError):
+        getSoAArrayOfDynamicStructuresType([1, 2, 3], [
+            ('NumElements', c_uint8),
+            ('Array', lambda self, buffer: c_uint8 * self.NumElements),
+        ], arrayLength=1)
+
 def test_using_other_tuple_type():
     ''' ensures that getStructureType can correctly copy over special params from a special tuple class '''
     buffer = [a for a in range(255)]
@@ -226,4 +504,20 @@ def test_using_other_tuple_type():
     structureType = getStructureType(s, buffer)
     assert sizeof(structureType) == 1
 
-    assert structureType._fields_[0].testField == 'test field'
\ No newline at end of file
+    assert structureType._fields_[0].testField == 'test field'
+
+def test_sizeof_uses_cached_size():
+    ''' ensures generated classes carry a cached size and sizeof() uses/falls back correctly '''
+    structure = getDynamicStructure([
+        ('A', c_uint8),
+        ('B', c_uint8),
+        ('C', c_uint16),
+    ], bytes([1, 2, 3, 4]))
+
+    assert type(structure)._cached_size == 4
+    assert sizeof(structure) == 4
+    assert sizeof(type(structure)) == 4
+
+    # non-generated types should still work via plain ctypes sizeof
+    assert sizeof(c_uint32) == 4
+    assert sizeof(c_uint32()) == 4